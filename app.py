@@ -1,4 +1,9 @@
-from random import shuffle, choices
+from random import shuffle, random
+import difflib
+import re
+import sys
+import unicodedata
+import zlib
 import streamlit as st
 from skimage.feature import local_binary_pattern
 from skimage import filters
@@ -14,9 +19,11 @@ import sqlite3
 from passlib.hash import bcrypt
 
 # ------------------ Database Setup ------------------
+DB_PATH = 'users.db'
+
 def init_db():
     """Initialize database and create users table"""
-    conn = sqlite3.connect('users.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -30,7 +37,7 @@ def init_db():
 def create_user(username, password):
     """Create new user with hashed password"""
     hashed = bcrypt.hash(password)
-    conn = sqlite3.connect('users.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     try:
         c.execute('INSERT INTO users VALUES (?, ?)', (username, hashed))
@@ -43,7 +50,7 @@ def create_user(username, password):
 
 def verify_user(username, password):
     """Verify user credentials"""
-    conn = sqlite3.connect('users.db')
+    conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute('SELECT password_hash FROM users WHERE username = ?', (username,))
     result = c.fetchone()
@@ -196,16 +203,19 @@ def detect_acne_severity(image):
         return 0
 
 # ------------------ Product Recommendations ------------------
+NYKAA_BASE_URL = "https://www.nykaa.com"
+PURPLLE_BASE_URL = "https://www.purplle.com"
+
 def scrape_products(query, limit=3):
     all_products = []
     
     # 1. Nykaa Scraper
     def scrape_nykaa(query, limit):
-        search_url = f"https://www.nykaa.com/search/result/?q={query.replace(' ', '%20')}"
+        search_url = f"{NYKAA_BASE_URL}/search/result/?q={query.replace(' ', '%20')}"
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.nykaa.com/"
+            "Referer": f"{NYKAA_BASE_URL}/"
         }
         
         try:
@@ -220,7 +230,7 @@ def scrape_products(query, limit=3):
                 try:
                     name = product.find("div", class_="css-xrzmfa").text.strip()
                     price = product.find("span", class_="css-111z9ua").text.strip()
-                    link = "https://www.nykaa.com" + product.find("a")["href"]
+                    link = NYKAA_BASE_URL + product.find("a")["href"]
                     image = product.find("img")["src"] if product.find("img") else ""
                     product_list.append({
                         "name": name, 
@@ -240,7 +250,7 @@ def scrape_products(query, limit=3):
 
     # 2. Purplle Scraper
     def scrape_purplle(query, limit):
-        search_url = f"https://www.purplle.com/search?search={query.replace(' ', '+')}"
+        search_url = f"{PURPLLE_BASE_URL}/search?search={query.replace(' ', '+')}"
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept-Language": "en-US,en;q=0.9"
@@ -258,7 +268,7 @@ def scrape_products(query, limit=3):
                 try:
                     name = product.find("div", class_="product-name").text.strip()
                     price = product.find("span", class_="product-price").text.strip()
-                    link = "https://www.purplle.com" + product.find("a")["href"]
+                    link = PURPLLE_BASE_URL + product.find("a")["href"]
                     image = product.find("img")["data-src"] if product.find("img") else ""
                     product_list.append({
                         "name": name, 
@@ -280,8 +290,253 @@ def scrape_products(query, limit=3):
     per_site_limit = max(1, limit // 2)
     all_products.extend(scrape_nykaa(query, per_site_limit))
     all_products.extend(scrape_purplle(query, per_site_limit))
-    
-    return all_products[:limit]
+
+    return dedupe_products(all_products)[:limit]
+
+# ------------------ Product Aggregation ------------------
+SIZE_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(ml|g|gm|gms|mg|l|kg|oz)\b")
+NUMBER_PATTERN = re.compile(r"(?:spf)?\d+(?:\.\d+)?%?")
+PRICE_PATTERN = re.compile(r"(?:₹|rs\.?)\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+MINHASH_PERMUTATIONS = 32
+MINHASH_BANDS = 8
+MINHASH_PRIME = (1 << 31) - 1
+_minhash_rng = np.random.RandomState(1337)
+MINHASH_A = _minhash_rng.randint(1, MINHASH_PRIME, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+MINHASH_B = _minhash_rng.randint(1, MINHASH_PRIME, size=MINHASH_PERMUTATIONS).astype(np.uint64)
+
+def canonicalize_name(name):
+    """Normalize a product name for comparison across retailers"""
+    name = unicodedata.normalize("NFKC", name).lower()
+    name = SIZE_PATTERN.sub(lambda m: f" {m.group(1)}{'g' if m.group(2) in ('gm', 'gms') else m.group(2)} ", name)
+    name = re.sub(r"\bspf\s*(\d+)", r"spf\1", name)
+    name = re.sub(r"(\d)\s+%", r"\1%", name)
+    name = re.sub(r"[^\w%.]+", " ", name)
+    return " ".join(name.split())
+
+def product_attributes(key):
+    """Split a canonical name's numbers into pack sizes and other attributes.
+
+    Other attributes cover strengths ('10%'), SPF ('spf50') and any remaining
+    number, so variants of one line never count as the same product.
+    """
+    sizes = frozenset(m.group(0).replace(" ", "") for m in SIZE_PATTERN.finditer(key))
+    numbers = frozenset(NUMBER_PATTERN.findall(SIZE_PATTERN.sub(" ", key)))
+    return sizes, numbers
+
+def parse_price(price):
+    """Extract the lowest amount from a scraped price string like '₹1,299'.
+
+    Listings that show both MRP and sale price ('MRP ₹1,299 ₹999') yield the
+    sale price; discount percentages are ignored.
+    """
+    price = price.replace(",", "")
+    amounts = [float(amount) for amount in PRICE_PATTERN.findall(price)]
+    if not amounts:
+        amounts = [float(m) for m in re.findall(r"\d+(?:\.\d+)?(?!\d|\.|\s*%)", price)]
+    return min(amounts) if amounts else None
+
+def tokens_match(key_a, key_b):
+    """Whether every word of each name has a counterpart in the other.
+
+    Spelling variants ('moisturizer' / 'moisturiser') count as counterparts;
+    an extra word ('pro', 'cream', '+ e') makes the names different products.
+    Pack sizes are left to product_attributes.
+    """
+    tokens_a = set(SIZE_PATTERN.sub(" ", key_a).split())
+    tokens_b = set(SIZE_PATTERN.sub(" ", key_b).split())
+
+    def covered(tokens, others):
+        for token in tokens - others:
+            if len(token) < 4 or not any(
+                difflib.SequenceMatcher(None, token, other).ratio() >= 0.8 for other in others
+            ):
+                return False
+        return True
+
+    return covered(tokens_a, tokens_b) and covered(tokens_b, tokens_a)
+
+def minhash_signature(text, shingle_size=3):
+    """MinHash signature over character shingles of a canonical name"""
+    padded = f" {text} "
+    shingles = {padded[i:i + shingle_size] for i in range(max(1, len(padded) - shingle_size + 1))}
+    hashes = np.array([zlib.crc32(s.encode("utf-8")) % MINHASH_PRIME for s in shingles], dtype=np.uint64)
+    # a, b and x are all below p = 2**31 - 1, so a * x + b fits in 64 bits and
+    # wraps around p many times, giving properly shuffled permutations
+    permuted = (np.outer(MINHASH_A, hashes) + MINHASH_B[:, None]) % MINHASH_PRIME
+    return permuted.min(axis=1)
+
+def dedupe_products(products, threshold=0.75):
+    """Merge duplicate listings into one record with an offer per source.
+
+    Exact duplicates share a canonical-name key; near duplicates are found
+    with MinHash banding (LSH), so only products sharing a band are compared.
+    A near-duplicate merge joins listings from different retailers only, is
+    checked against each cluster's representative name, and never joins
+    different strengths, SPF, pack sizes or extra words in the name.
+    """
+    return list(iter_merged_products(products, threshold))
+
+def iter_merged_products(products, threshold=0.75):
+    """Yield merged records one at a time; see dedupe_products"""
+    if not products:
+        return
+
+    # Exact matches: group by canonical name
+    groups = {}
+    for product in products:
+        key = canonicalize_name(product['name'])
+        groups.setdefault(key, []).append(product)
+    keys = list(groups)
+
+    # Near duplicates: LSH candidate pairs, verified against each cluster's
+    # root, whose key acts as the cluster's representative name
+    parent = list(range(len(keys)))
+    attributes = [product_attributes(key) for key in keys]
+    # Pack sizes and retailers seen in each cluster, kept on its root so an
+    # unsized listing cannot chain two sizes together and one retailer's
+    # listings are never folded into each other
+    root_sizes = [sizes for sizes, _ in attributes]
+    root_sources = [
+        frozenset(offer['source'] for listing in groups[key] for offer in listing.get('offers', [listing]))
+        for key in keys
+    ]
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = [minhash_signature(key) for key in keys]
+    rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+    buckets = defaultdict(list)
+    for idx, signature in enumerate(signatures):
+        for band in range(MINHASH_BANDS):
+            buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(idx)
+
+    for members in buckets.values():
+        for pos, first in enumerate(members):
+            for other in members[pos + 1:]:
+                root_a, root_b = find(first), find(other)
+                if root_a == root_b or root_sources[root_a] & root_sources[root_b]:
+                    continue
+                # Different strengths or SPF are different products
+                if attributes[root_a][1] != attributes[root_b][1]:
+                    continue
+                merged_sizes = root_sizes[root_a] | root_sizes[root_b]
+                if len(merged_sizes) > 1:
+                    continue
+                similarity = np.mean(signatures[root_a] == signatures[root_b])
+                if similarity >= threshold and tokens_match(keys[root_a], keys[root_b]):
+                    parent[root_b] = root_a
+                    root_sizes[root_a] = merged_sizes
+                    root_sources[root_a] = root_sources[root_a] | root_sources[root_b]
+
+    clusters = defaultdict(list)
+    for idx, key in enumerate(keys):
+        clusters[find(idx)].extend(groups[key])
+
+    for root in sorted(clusters):
+        yield merge_listings(clusters.pop(root))
+
+def merge_listings(listings):
+    """Combine listings of the same product into a single record"""
+    offers_by_source = {}
+    for listing in listings:
+        # Records merged earlier already carry their offers
+        for offer in listing.get('offers', [listing]):
+            value = parse_price(offer['price'])
+            current = offers_by_source.get(offer['source'])
+            if current is not None and (value is None or (current['value'] is not None and current['value'] <= value)):
+                continue
+            offers_by_source[offer['source']] = {
+                "source": offer['source'],
+                "price": offer['price'],
+                "link": offer['link'],
+                "value": value
+            }
+    offers = sorted(
+        offers_by_source.values(),
+        key=lambda offer: float("inf") if offer['value'] is None else offer['value']
+    )
+
+    best = offers[0]
+    queries = list(dict.fromkeys(
+        query for listing in listings for query in listing['query'].split(" | ")
+    ))
+    return {
+        "name": listings[0]['name'],
+        "price": best['price'],
+        "link": best['link'],
+        "image": next((listing['image'] for listing in listings if listing['image']), ""),
+        "source": best['source'],
+        "query": " | ".join(queries),
+        "offers": offers
+    }
+
+class ProductCandidates:
+    """Struct-of-arrays view of a candidate pool.
+
+    Each field is a parallel list, weights live in a single float array and
+    offers are flattened into offer_* arrays indexed by offer_starts, so
+    scoring and sampling work on indices instead of product dicts. Fields
+    that repeat across products (price, source, query) are interned.
+    Use product(idx) to build a dict for display.
+    """
+    __slots__ = (
+        "names", "prices", "links", "images", "sources", "queries",
+        "offer_starts", "offer_sources", "offer_prices", "offer_links", "offer_values",
+        "weights"
+    )
+
+    def __init__(self, products):
+        self.names, self.prices, self.links, self.images = [], [], [], []
+        self.sources, self.queries = [], []
+        self.offer_sources, self.offer_prices, self.offer_links = [], [], []
+        offer_starts, offer_values = [0], []
+        # Accepts any iterable, so merged records can be streamed in
+        for p in products:
+            self.names.append(p['name'])
+            self.prices.append(sys.intern(p['price']))
+            self.links.append(p['link'])
+            self.images.append(p['image'])
+            self.sources.append(sys.intern(p['source']))
+            self.queries.append(sys.intern(p['query']))
+            for offer in p.get('offers', []):
+                self.offer_sources.append(sys.intern(offer['source']))
+                self.offer_prices.append(sys.intern(offer['price']))
+                self.offer_links.append(offer['link'])
+                offer_values.append(np.nan if offer['value'] is None else offer['value'])
+            offer_starts.append(len(offer_values))
+        self.offer_starts = np.array(offer_starts, dtype=np.int32)
+        self.offer_values = np.array(offer_values, dtype=np.float64)
+        self.weights = np.ones(len(self.names), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.names)
+
+    def product(self, idx):
+        """Materialize the candidate at idx as a product dict"""
+        product = {
+            "name": self.names[idx],
+            "price": self.prices[idx],
+            "link": self.links[idx],
+            "image": self.images[idx],
+            "source": self.sources[idx],
+            "query": self.queries[idx]
+        }
+        start, end = self.offer_starts[idx], self.offer_starts[idx + 1]
+        if end > start:
+            product["offers"] = [
+                {
+                    "source": self.offer_sources[i],
+                    "price": self.offer_prices[i],
+                    "link": self.offer_links[i],
+                    "value": None if np.isnan(self.offer_values[i]) else float(self.offer_values[i])
+                }
+                for i in range(start, end)
+            ]
+        return product
 
    
 
@@ -326,18 +581,21 @@ def get_routine(skin_type):
     return routines.get(skin_type, {})
 
 
-def calculate_product_weights(products, skin_concerns, acne_level, sensitivity):
-    weighted_products = []
-    for product in products:
+def calculate_product_weights(candidates, skin_concerns, acne_level, sensitivity):
+    """Score every candidate in place and return the weight array"""
+    concerns = [concern.lower() for concern in skin_concerns]
+    weights = candidates.weights
+    for idx in range(len(candidates)):
         weight = 1
         
         # Base weight from query match
-        if any(concern.lower() in product['query'] for concern in skin_concerns):
+        query = candidates.queries[idx]
+        if any(concern in query for concern in concerns):
             weight += 3
         
         # Boost for exact matches
-        name_lower = product['name'].lower()
-        if any(concern.lower() in name_lower for concern in skin_concerns):
+        name_lower = candidates.names[idx].lower()
+        if any(concern in name_lower for concern in concerns):
             weight += 5
             
         # Acne relevance
@@ -348,9 +606,9 @@ def calculate_product_weights(products, skin_concerns, acne_level, sensitivity):
         if sensitivity >= 3 and any(term in name_lower for term in ['calm', 'sensitive', 'fragrance-free']):
             weight += sensitivity * 2
             
-        weighted_products.append((product, weight))
+        weights[idx] = weight
     
-    return weighted_products
+    return weights
 
 def get_recommendations(skin_concerns, routine_steps, skin_tone, acne_level, texture, sensitivity):
     all_products = []
@@ -392,34 +650,37 @@ def get_recommendations(skin_concerns, routine_steps, skin_tone, acne_level, tex
     
     for query in specialized_queries:
         all_products.extend(scrape_products(query, limit=2))
-    
-    # Calculate weights and randomize
-    weighted_products = calculate_product_weights(all_products, skin_concerns, acne_level, sensitivity)
-    
-    if not weighted_products:
+
+    # Overlapping queries return the same products; merge them straight into
+    # the candidate set and release the scraped dicts before weighting
+    candidates = ProductCandidates(iter_merged_products(all_products))
+    del all_products
+
+    if not len(candidates):
         return []
-    
-    # Separate products and weights
-    products, weights = zip(*weighted_products)
-    
+
+    # Calculate weights and randomize
+    weights = calculate_product_weights(candidates, skin_concerns, acne_level, sensitivity)
+
+    # Weighted sampling without replacement: ordering by u ** (1 / w) draws
+    # candidates in the same distribution as repeatedly choosing by weight
+    keys = np.array([random() for _ in range(len(candidates))])
+    sample_order = np.argsort(-(keys ** (1.0 / weights)))
+
     # Select products with weighted randomness
     selected_products = []
-    remaining_products = list(products)
-    remaining_weights = list(weights)
     
     # Ensure we get diverse categories
     category_counts = defaultdict(int)
     max_per_category = 4
     
-    while len(selected_products) < 15 and remaining_products:
-        # Choose with weights
-        chosen_idx = choices(range(len(remaining_products)), weights=remaining_weights, k=1)[0]
-        chosen_product = remaining_products.pop(chosen_idx)
-        remaining_weights.pop(chosen_idx)
+    for chosen_idx in sample_order:
+        if len(selected_products) >= 15:
+            break
         
         # Determine category
         category = "other"
-        name_lower = chosen_product['name'].lower()
+        name_lower = candidates.names[chosen_idx].lower()
         if any(word in name_lower for word in ['cleanse', 'wash']):
             category = "cleanser"
         elif any(word in name_lower for word in ['serum', 'treatment', 'acid']):
@@ -432,7 +693,7 @@ def get_recommendations(skin_concerns, routine_steps, skin_tone, acne_level, tex
         # Add if category not full
         if category_counts[category] < max_per_category:
             category_counts[category] += 1
-            selected_products.append(chosen_product)
+            selected_products.append(candidates.product(chosen_idx))
     
     # Final shuffle
     shuffle(selected_products)
@@ -523,12 +784,16 @@ def main_app():
             if products:
                 cols = st.columns(3)
                 for idx, product in enumerate(products):
+                    offers_line = " · ".join(
+                        f"{offer['source']} {offer['price']}" for offer in product.get('offers', [])
+                    )
                     with cols[idx % 3]:
                         st.markdown(f"""
                         <div style="border:1px solid #e0e0e0; border-radius:8px; padding:15px; margin-bottom:20px; text-align:center;">
                             <img src="{product['image']}" style="max-height:150px; width:auto; border-radius:4px; margin-bottom:10px;">
                             <h4 style="margin:5px 0; font-size:16px;">{product['name']}</h4>
                             <p style="color:#f43397; font-weight:bold; margin:5px 0;">{product['price']}</p>
+                            <p style="color:#888; font-size:12px; margin:5px 0;">{offers_line}</p>
                             <a href="{product['link']}" target="_blank" style="background:#f43397; color:white; padding:8px 12px; border-radius:4px; text-decoration:none;">
                                 View Product
                             </a>
@@ -0,0 +1,101 @@
+"""Memory benchmark: product dict lists vs ProductCandidates.
+
+Simulates several concurrent sessions, each holding the candidate pool that
+get_recommendations keeps at its selection step, and reports retained and
+peak memory per representation, measured with tracemalloc.
+
+Both sides start from the same scraped listings (every product is listed by
+both retailers under two queries) and run the app's dedupe code:
+
+* dict lists: the previous flow, dedupe_products into dicts, then the
+  (product, weight) tuples and the remaining_products/remaining_weights copies.
+* ProductCandidates: the current flow, iter_merged_products streamed into
+  the candidate set with the scraped list released afterwards.
+
+    python benchmarks/bench_candidates.py --products 2000 --sessions 5
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ProductCandidates, calculate_product_weights, dedupe_products, iter_merged_products
+
+SOURCES = ["Nykaa", "Purplle"]
+QUERIES = ["vitamin c serum", "acne treatment serum", "ceramide moisturizer", "spf 50 pa+++ sunscreen"]
+SKIN_CONCERNS = ["Acne", "Dryness"]
+LINES = ["Hydrating Serum", "Gel Moisturizer", "Foaming Cleanser", "Matte Sunscreen", "Clarifying Toner"]
+
+
+def fresh(text):
+    """Copy a string the way parsing HTML yields a new object per product"""
+    return "".join(list(text))
+
+
+def scraped_products(count):
+    """Fresh listings as one session gets them from the scrapers"""
+    products = []
+    for i in range(count):
+        name = f"Brand{i} {LINES[i % len(LINES)]} {30 + 10 * (i % 3)}ml"
+        for q in range(2):
+            query = QUERIES[(i + q) % len(QUERIES)]
+            for source in SOURCES:
+                products.append({
+                    "name": fresh(name),
+                    "price": f"₹{300 + (i * 7 + q) % 900:,}",
+                    "link": f"https://www.{source.lower()}.com/p/{i}",
+                    "image": f"https://images.{source.lower()}.com/{i}.jpg",
+                    "source": fresh(source),
+                    "query": fresh(query)
+                })
+    return products
+
+
+def dict_session(all_products):
+    """State the previous get_recommendations held while selecting"""
+    all_products = dedupe_products(all_products)
+    weighted_products = [(product, 1 + (i % 7)) for i, product in enumerate(all_products)]
+    products, weights = zip(*weighted_products)
+    return all_products, weighted_products, products, weights, list(products), list(weights)
+
+
+def candidate_session(all_products):
+    """State the current get_recommendations holds while selecting"""
+    candidates = ProductCandidates(iter_merged_products(all_products))
+    calculate_product_weights(candidates, SKIN_CONCERNS, acne_level=3, sensitivity=3)
+    return candidates
+
+
+def measure(build, products, sessions):
+    tracemalloc.start()
+    retained = []
+    for _ in range(sessions):
+        # Only the session state survives; the scraped list is released
+        retained.append(build(scraped_products(products)))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=2000, help="distinct products per session")
+    parser.add_argument("--sessions", type=int, default=5, help="concurrent sessions to hold in memory")
+    args = parser.parse_args()
+
+    print(f"{args.products} products ({args.products * 4} listings) x {args.sessions} sessions")
+    results = {}
+    for label, build in (("dict lists", dict_session), ("ProductCandidates", candidate_session)):
+        current, peak = measure(build, args.products, args.sessions)
+        results[label] = current
+        print(f"{label:>18}: retained {current / 2**20:8.2f} MiB, peak {peak / 2**20:8.2f} MiB, "
+              f"{current / (args.products * args.sessions):6.1f} B/product")
+
+    saved = 1 - results["ProductCandidates"] / results["dict lists"]
+    print(f"{'saving':>18}: {saved:.1%} of retained memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Load test: concurrent virtual users driving the full app flow.
+
+Each virtual user runs in its own thread, like a Streamlit script thread, and
+repeats login -> upload -> recommend by calling the app's functions directly.
+Retailer scraping is pointed at a local stub server, running in its own
+process so it does not compete for the app's GIL, with injectable latency
+and error rate. Users are created in a throwaway database before each
+level's timer starts.
+
+For every concurrency level the script reports p50/p95/p99 latency per step,
+flow throughput, failures and injected retailer errors, then names the
+saturation point: the first level where adding users stops raising
+throughput or p95 of a full flow breaks the SLO.
+
+Pass --image with a real selfie: the default synthetic image has no face, so
+skin tone detection skips KMeans and upload timings come out optimistic.
+
+    python benchmarks/load_test.py --users 1,2,4,8,16 --flows 3 --latency 50 --error-rate 0.05
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app
+
+STEPS = ("login", "upload", "recommend", "flow")
+BRANDS = ["Minimalist", "Cetaphil", "CeraVe", "Plum", "Dot & Key", "The Derma Co"]
+PASSWORD = "loadtest-password"
+
+
+# ------------------ Stub Retailer ------------------
+class StubRetailerHandler(BaseHTTPRequestHandler):
+    """Serves search pages in the markup the Nykaa and Purplle scrapers parse"""
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    products_per_page = 10
+    # The scrapers turn any non-200 into an empty result, so failures are
+    # counted here, in values shared with the load generator process
+    requests_served = None
+    errors_injected = None
+
+    def do_GET(self):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        failed = random.random() < self.error_rate
+        with self.requests_served.get_lock():
+            self.requests_served.value += 1
+        if failed:
+            with self.errors_injected.get_lock():
+                self.errors_injected.value += 1
+            self.send_error(503, "Injected failure")
+            return
+
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path.startswith("/search/result"):
+            body = self.nykaa_page(params.get("q", [""])[0])
+        elif url.path.startswith("/search"):
+            body = self.purplle_page(params.get("search", [""])[0])
+        else:
+            self.send_error(404)
+            return
+
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def listings(self, query):
+        # Seeded by query so overlapping searches return overlapping products
+        rng = random.Random(query.lower())
+        for i in range(self.products_per_page):
+            brand = rng.choice(BRANDS)
+            size = rng.choice([30, 50, 100])
+            yield i, f"{brand} {query.title()} {size}ml", f"₹{rng.randint(199, 1999):,}"
+
+    def nykaa_page(self, query):
+        items = "".join(
+            f'<div class="css-d5z3ro"><a href="/p/{i}"><img src="/img/{i}.jpg"></a>'
+            f'<div class="css-xrzmfa">{name}</div><span class="css-111z9ua">{price}</span></div>'
+            for i, name, price in self.listings(query)
+        )
+        return f"<html><body>{items}</body></html>"
+
+    def purplle_page(self, query):
+        items = "".join(
+            f'<div class="product-item"><a href="/product/{i}"><img data-src="/img/{i}.jpg"></a>'
+            f'<div class="product-name">{name}</div><span class="product-price">{price}</span></div>'
+            for i, name, price in self.listings(query)
+        )
+        return f"<html><body>{items}</body></html>"
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_stub(latency, jitter, error_rate, counters, ports):
+    """Stub server process entry point; reports its port through ports"""
+    StubRetailerHandler.latency = latency
+    StubRetailerHandler.jitter = jitter
+    StubRetailerHandler.error_rate = error_rate
+    StubRetailerHandler.requests_served, StubRetailerHandler.errors_injected = counters
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRetailerHandler)
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_stub_server(latency, jitter, error_rate):
+    """Start the stub retailer in a separate process.
+
+    Returns the process, its base URL and the (served, injected) counters.
+    """
+    counters = (multiprocessing.Value("i", 0), multiprocessing.Value("i", 0))
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=serve_stub, args=(latency, jitter, error_rate, counters, ports), daemon=True
+    )
+    process.start()
+    return process, f"http://127.0.0.1:{ports.get(timeout=30)}", counters
+
+
+def reset_counts(counters):
+    """Return (requests served, errors injected) since the last reset"""
+    values = []
+    for counter in counters:
+        with counter.get_lock():
+            values.append(counter.value)
+            counter.value = 0
+    return tuple(values)
+
+
+# ------------------ Virtual Users ------------------
+def load_image(path):
+    if path:
+        image = Image.open(path).convert("RGB")
+    else:
+        # Synthetic selfie-sized noise. No face is found in it, so skin tone
+        # detection stops before KMeans and upload timings are optimistic
+        rng = np.random.RandomState(0)
+        image = Image.fromarray(rng.randint(0, 256, size=(480, 640, 3), dtype=np.uint8))
+
+    if app.extract_skin_region(image) is None:
+        print("Warning: no face detected in the upload image, so skin tone KMeans is skipped "
+              "and upload/saturation numbers are optimistic. Pass --image with a selfie "
+              "for realistic results.")
+    return image
+
+
+def record_error(errors, lock, error):
+    with lock:
+        errors[f"{type(error).__name__}: {error}"] += 1
+
+
+def virtual_user(user_id, flows, image, timings, errors, lock, ready):
+    # Sign up before the level's timer starts so bcrypt hashing for new
+    # accounts is not counted against flow throughput
+    username = f"vu-{user_id}-{random.getrandbits(32):08x}"
+    signed_up = False
+    try:
+        if not app.create_user(username, PASSWORD):
+            raise RuntimeError("user already exists")
+        signed_up = True
+    except Exception as e:
+        record_error(errors, lock, e)
+    finally:
+        ready.wait()
+
+    if not signed_up:
+        # Without an account every flow would fail at login
+        return
+
+    for _ in range(flows):
+        durations = {}
+        flow_start = time.perf_counter()
+        try:
+            start = time.perf_counter()
+            if not app.verify_user(username, PASSWORD):
+                raise RuntimeError("login rejected")
+            durations["login"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            skin_tone = app.detect_skin_tone(image) or "Medium"
+            acne_level = app.detect_acne_severity(image)
+            durations["upload"] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            skin_type = random.choice(["Normal", "Dry", "Oily", "Combination", "Sensitive"])
+            app.get_recommendations(
+                ["Acne", "Dryness"], app.get_routine(skin_type), skin_tone,
+                acne_level, "Smooth", random.randint(0, 5)
+            )
+            durations["recommend"] = time.perf_counter() - start
+        except Exception as e:
+            record_error(errors, lock, e)
+            continue
+
+        durations["flow"] = time.perf_counter() - flow_start
+        with lock:
+            for step, duration in durations.items():
+                timings[step].append(duration)
+
+
+def run_level(users, flows, image):
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    ready = threading.Barrier(users + 1)
+    threads = [
+        threading.Thread(target=virtual_user, args=(i, flows, image, timings, errors, lock, ready))
+        for i in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return timings, errors, elapsed
+
+
+# ------------------ Reporting ------------------
+def percentiles(samples):
+    if not samples:
+        return (float("nan"),) * 3
+    return tuple(np.percentile(samples, [50, 95, 99]))
+
+
+def find_saturation(levels, slo, min_gain):
+    """First level whose throughput gain is below min_gain or whose flow p95 exceeds slo"""
+    previous = None
+    for users, throughput, flow_p95 in levels:
+        if slo and flow_p95 > slo:
+            return users, f"flow p95 {flow_p95:.2f}s exceeds SLO {slo:.2f}s"
+        if previous and throughput < previous * (1 + min_gain):
+            return users, f"throughput {throughput:.2f} flows/s vs {previous:.2f} at the previous level"
+        previous = throughput
+    return None, "not reached"
+
+
+def run_levels(args, counters):
+    """Ramp through the configured user counts, printing a report per level"""
+    with tempfile.TemporaryDirectory() as tmp:
+        app.DB_PATH = os.path.join(tmp, "users.db")
+        app.init_db()
+        image = load_image(args.image)
+
+        print(f"Stub retailer at {app.NYKAA_BASE_URL}: latency {args.latency:.0f}±{args.jitter:.0f} ms, "
+              f"error rate {args.error_rate:.0%}")
+        print(f"{'users':>5} {'step':>10} {'p50 (s)':>9} {'p95 (s)':>9} {'p99 (s)':>9} {'n':>5}")
+
+        levels = []
+        for users in (int(u) for u in args.users.split(",")):
+            reset_counts(counters)
+            timings, errors, elapsed = run_level(users, args.flows, image)
+            served, injected = reset_counts(counters)
+            for step in STEPS:
+                p50, p95, p99 = percentiles(timings[step])
+                print(f"{users:>5} {step:>10} {p50:>9.3f} {p95:>9.3f} {p99:>9.3f} {len(timings[step]):>5}")
+            throughput = len(timings["flow"]) / elapsed
+            failed = ", ".join(f"{name} x{count}" for name, count in errors.items()) or "none"
+            print(f"{users:>5} {'throughput':>10} {throughput:.2f} flows/s, failures: {failed}, "
+                  f"retailer errors: {injected}/{served} requests")
+            levels.append((users, throughput, percentiles(timings["flow"])[1]))
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", default="1,2,4,8", help="comma separated virtual user counts to ramp through")
+    parser.add_argument("--flows", type=int, default=3, help="login/upload/recommend flows per virtual user")
+    parser.add_argument("--latency", type=float, default=50, help="stub retailer latency in ms")
+    parser.add_argument("--jitter", type=float, default=10, help="random +/- latency jitter in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub requests failing with 503")
+    parser.add_argument("--image", help="selfie to upload (defaults to a synthetic image)")
+    parser.add_argument("--slo", type=float, default=0, help="flow p95 in seconds treated as saturated (0 to disable)")
+    parser.add_argument("--min-gain", type=float, default=0.1, help="throughput gain per level below which the server is saturated")
+    args = parser.parse_args()
+
+    server, stub_url, counters = start_stub_server(args.latency / 1000, args.jitter / 1000, args.error_rate)
+    app.NYKAA_BASE_URL = stub_url
+    app.PURPLLE_BASE_URL = stub_url
+
+    try:
+        levels = run_levels(args, counters)
+    finally:
+        server.terminate()
+        server.join()
+
+    saturation, reason = find_saturation(levels, args.slo, args.min_gain)
+    if saturation is None:
+        print(f"Saturation point: {reason} (up to {levels[-1][0]} users)")
+    else:
+        print(f"Saturation point: {saturation} users ({reason})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Behavior checks for product deduplication in app.py (run with pytest)"""
+import itertools
+import random
+
+import numpy as np
+
+from app import canonicalize_name, dedupe_products, minhash_signature, parse_price
+
+BRANDS = ["Minimalist", "Cetaphil", "CeraVe", "Plum", "Dot & Key", "The Derma Co",
+          "Neutrogena", "Mamaearth", "Simple", "Bioderma", "Re'equil", "Foxtale"]
+ACTIVES = ["Niacinamide", "Vitamin C", "Hyaluronic", "Retinol", "Salicylic", "Ceramide",
+           "Green Tea", "Centella", "Peptide", "Squalane", "Kojic", "Aloe Vera"]
+LINES = ["Gel Moisturizer", "Face Serum", "Foaming Cleanser", "Night Cream", "Toner", "Face Wash",
+         "Sleeping Mask", "Eye Cream", "Sunscreen Gel", "Face Mist", "Body Lotion", "Clay Mask"]
+
+
+def listing(name, source, price="₹500", query="q"):
+    return {"name": name, "price": price, "link": f"/{source}/{name}", "image": "",
+            "source": source, "query": query}
+
+
+def merged_names(*pairs):
+    return sorted(sorted(o['source'] for o in record['offers'])
+                  for record in dedupe_products([listing(n, s) for n, s in pairs]))
+
+
+def shingles(text):
+    padded = f" {canonicalize_name(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def test_minhash_estimates_jaccard():
+    rng = random.Random(0)
+    names = [f"{b} {a} {l}" for b, a, l in itertools.product(BRANDS, ACTIVES, LINES)]
+    errors = []
+    for _ in range(300):
+        a, b = rng.sample(names, 2)
+        exact = len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+        estimate = np.mean(minhash_signature(canonicalize_name(a)) == minhash_signature(canonicalize_name(b)))
+        errors.append(abs(exact - estimate))
+    assert np.mean(errors) < 0.07
+
+
+def test_distinct_products_stay_separate():
+    pairs = [
+        ("Cetaphil Gentle Skin Cleanser", "Cetaphil Gentle Skin Cleanser Pro"),
+        ("Neutrogena Hydro Boost Water Gel", "Neutrogena Hydro Boost Water Gel Cream"),
+        ("Dot & Key Vitamin C Serum", "Dot & Key Vitamin C + E Serum"),
+        ("Minimalist 10% Niacinamide Face Serum 30ml", "Minimalist 5% Niacinamide Face Serum 30ml"),
+        ("Plum SPF 50 Sunscreen", "Plum SPF 30 Sunscreen"),
+    ]
+    for a, b in pairs:
+        assert len(dedupe_products([listing(a, "Nykaa"), listing(b, "Purplle")])) == 2, (a, b)
+
+
+def test_sizes_do_not_chain_through_unsized_listing():
+    records = dedupe_products([
+        listing("Cetaphil Gentle Skin Cleanser 125ml", "Nykaa"),
+        listing("Cetaphil Gentle Skin Cleanser", "Purplle"),
+        listing("Cetaphil Gentle Skin Cleanser 250ml", "Purplle", price="₹999"),
+    ])
+    assert len(records) == 2
+
+
+def test_cross_retailer_variants_merge():
+    pairs = [
+        ("Minimalist Sepicalm 3% + Oats Moisturizer", "Minimalist Sepicalm 3% + Oats Moisturiser"),
+        ("Minimalist 10% Niacinamide Face Serum 30ml", "Minimalist 10 % Niacinamide Face Serum (30 ml)"),
+        ("Plum SPF 50 Sunscreen", "Plum Sunscreen SPF50"),
+        ("Cetaphil Gentle Skin Cleanser", "cetaphil gentle skin cleanser 125ml"),
+    ]
+    for a, b in pairs:
+        assert merged_names((a, "Nykaa"), (b, "Purplle")) == [["Nykaa", "Purplle"]], (a, b)
+
+
+def test_same_retailer_listings_are_not_near_merged():
+    assert merged_names(
+        ("Minimalist Sepicalm 3% + Oats Moisturizer", "Nykaa"),
+        ("Minimalist Sepicalm 3% + Oats Moisturiser", "Nykaa"),
+    ) == [["Nykaa"], ["Nykaa"]]
+
+
+def test_catalogue_keeps_every_product():
+    names = [f"{b} {a} {l}" for b, a, l in itertools.product(BRANDS, ACTIVES, LINES)]
+    listings = [listing(n, "Nykaa") for n in names] + [listing(n.upper(), "Purplle") for n in names]
+    records = dedupe_products(listings)
+    assert len(records) == len(names)
+    assert all(len(record['offers']) == 2 for record in records)
+
+
+def test_cheapest_offer_per_retailer():
+    records = dedupe_products([
+        listing("CeraVe Moisturising Cream", "Nykaa", price="₹1,200", query="a"),
+        listing("CeraVe Moisturising Cream", "Nykaa", price="₹900", query="b"),
+    ])
+    assert [offer['price'] for offer in records[0]['offers']] == ["₹900"]
+    assert parse_price("MRP:₹1,299₹999 | 23% Off") == 999